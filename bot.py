@@ -1,10 +1,22 @@
 import os
+import re
+import sys
 import json
+import time
+import heapq
+import bisect
+import random
 import asyncio
 import logging
+import argparse
+import tempfile
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+import httpx
 from telegram import Update
-from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram.ext import Application, ChatMemberHandler, CommandHandler, ContextTypes
+from telegram.helpers import escape_markdown
+from telegram.request import BaseRequest, HTTPXRequest
 
 # ====================
 # НАСТРОЙКИ
@@ -12,6 +24,37 @@ from telegram.ext import Application, CommandHandler, ContextTypes
 TOKEN = os.getenv("BOT_TOKEN")
 ADMIN_ID = int(os.getenv("ADMIN_ID", "5633585199"))
 CHANNEL_ID = int(os.getenv("CHANNEL_ID", "-1002593053252"))
+CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "300"))  # секунд между проверками подписок
+
+# Сеть: отдельные пулы соединений для getUpdates и для остальных запросов
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "256"))  # как по умолчанию в python-telegram-bot
+UPDATES_POOL_SIZE = int(os.getenv("UPDATES_POOL_SIZE", "2"))
+HTTP_VERSION = os.getenv("HTTP_VERSION", "1.1")  # "2" - нужен пакет h2
+KEEPALIVE_EXPIRY = float(os.getenv("KEEPALIVE_EXPIRY", "60"))  # секунд держать простаивающее соединение
+# Таймауты чтения по методам API, переопределяются через API_TIMEOUTS="sendMessage=15,getChat=5"
+METHOD_TIMEOUTS = {
+    "getChat": 5.0,
+    "getChatMember": 5.0,
+    "sendMessage": 10.0,
+    "banChatMember": 10.0,
+    "unbanChatMember": 10.0,
+}
+API_TIMEOUTS = os.getenv("API_TIMEOUTS", "")
+
+# Кэши и прогрев при запуске
+PROFILE_TTL = int(os.getenv("PROFILE_TTL", "21600"))  # секунд считать профиль свежим
+CHANNEL_TTL = int(os.getenv("CHANNEL_TTL", "3600"))  # название канала и права бота
+WARMUP_WINDOW = int(os.getenv("WARMUP_WINDOW", str(3 * 86400)))  # прогревать тех, кто истекает в этом окне
+WARMUP_LIMIT = int(os.getenv("WARMUP_LIMIT", "200"))  # максимум профилей при прогреве
+WARMUP_RATE = float(os.getenv("WARMUP_RATE", "10"))  # запросов в секунду при прогреве
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "60"))  # дольше не ждём, начинаем работать
+HEALTH_PORT = int(os.getenv("HEALTH_PORT", os.getenv("PORT", "0")))  # 0 - без HTTP проверки
+
+# Сверка участников канала с базой
+RECONCILE_INTERVAL = int(os.getenv("RECONCILE_INTERVAL", "86400"))  # секунд между сверками, 0 - выключить
+RECONCILE_DRY_RUN = os.getenv("RECONCILE_DRY_RUN", "1") == "1"  # по расписанию только отчёт, без удалений
+RECONCILE_RATE = float(os.getenv("RECONCILE_RATE", "5"))  # удалений из канала в секунду
+RECONCILE_GRACE = int(os.getenv("RECONCILE_GRACE", str(7 * 86400)))  # недавно добавленных не чистим из базы
 
 # Настройка логов
 logging.basicConfig(
@@ -22,7 +65,173 @@ logger = logging.getLogger(__name__)
 
 # Файлы для хранения данных
 DATA_FILE = "users.json"
-HISTORY_FILE = "history.json"
+HISTORY_FILE = "history.jsonl"  # одна запись на строку, только дописывается
+LEGACY_HISTORY_FILE = "history.json"  # старый формат: последние 100 строк текста
+PROFILES_FILE = "profiles.json"  # имена и username, которые бот уже видел
+MEMBERS_FILE = "members.json"  # статусы участников канала по обновлениям chat_member
+
+# ====================
+# ЧАСЫ
+# ====================
+class Clock:
+    """Реальные часы: текущее время и ожидание"""
+
+    def now(self):
+        return datetime.now()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+class SimClock(Clock):
+    """Виртуальные часы для симуляции: время прыгает к ближайшему пробуждению,
+    когда всем задачам больше нечего делать. Одновременные sleep идут параллельно, как в жизни"""
+
+    def __init__(self, start=None):
+        self.current = start or datetime.now()
+        # (время пробуждения, порядковый номер, future спящей задачи)
+        self.sleepers = []
+        self.counter = 0
+
+    def now(self):
+        return self.current
+
+    async def sleep(self, seconds):
+        wake = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.sleepers, (self.current + timedelta(seconds=seconds), self.counter, wake))
+        self.counter += 1
+        await wake
+
+    async def sleep_until(self, moment):
+        await self.sleep(max((moment - self.current).total_seconds(), 0))
+
+    async def _settle(self):
+        """Ждёт, пока все готовые к выполнению задачи дойдут до очередного sleep"""
+        # В цикле событий симуляции нет ни сети, ни таймеров: пустая очередь готовых = все спят
+        loop = asyncio.get_running_loop()
+        while loop._ready:
+            await asyncio.sleep(0)
+
+    async def run(self, coroutine):
+        """Выполняет coroutine (и всё, что она запустила) на виртуальном времени"""
+        main = asyncio.ensure_future(coroutine)
+        while True:
+            await self._settle()
+            if main.done():
+                return main.result()
+            if not self.sleepers:
+                raise RuntimeError("Симуляция зависла: никто не спит и никто не готов")
+            moment, _, wake = heapq.heappop(self.sleepers)
+            # Отменённый sleep (задачу сняли) время не двигает
+            if not wake.done():
+                self.current = max(self.current, moment)
+                wake.set_result(None)
+
+# Все функции берут время только отсюда (в симуляции подменяется на SimClock)
+clock = Clock()
+
+# ====================
+# СЕТЬ
+# ====================
+class TrackedRequest(HTTPXRequest):
+    """HTTPXRequest с таймаутами по методам API и статистикой соединений и задержек"""
+
+    def __init__(self, connection_pool_size, method_timeouts=None, keepalive_expiry=KEEPALIVE_EXPIRY, **kwargs):
+        # Нужны в _build_client, который вызывается уже из super().__init__
+        self.connection_pool_size = connection_pool_size
+        self.keepalive_expiry = keepalive_expiry
+        self.method_timeouts = method_timeouts or {}
+        self.requests = 0
+        self.new_connections = 0
+        self.methods = {}  # метод -> {"calls", "errors", "total", "max"}
+        super().__init__(connection_pool_size=connection_pool_size, **kwargs)
+
+    def _build_client(self):
+        # Держим соединения открытыми дольше и считаем новые через trace httpcore
+        self._client_kwargs["limits"] = httpx.Limits(
+            max_connections=self.connection_pool_size,
+            max_keepalive_connections=self.connection_pool_size,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        self._client_kwargs["event_hooks"] = {"request": [self._attach_trace]}
+        return super()._build_client()
+
+    async def _attach_trace(self, request):
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+
+    async def do_request(
+        self,
+        url,
+        method,
+        request_data=None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ):
+        api_method = url.rsplit("/", 1)[-1]
+        if read_timeout is BaseRequest.DEFAULT_NONE and api_method in self.method_timeouts:
+            read_timeout = self.method_timeouts[api_method]
+        
+        stats = self.methods.setdefault(api_method, {"calls": 0, "errors": 0, "total": 0.0, "max": 0.0})
+        started = time.perf_counter()
+        try:
+            return await super().do_request(
+                url, method, request_data, read_timeout, write_timeout, connect_timeout, pool_timeout
+            )
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stats["calls"] += 1
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+
+    def report(self):
+        """Короткая сводка для /stats"""
+        reused = self.requests - self.new_connections
+        reuse_percent = reused * 100 / self.requests if self.requests else 0
+        lines = [
+            f"• HTTP {self.http_version}, запросов: {self.requests}",
+            f"• Новых соединений: {self.new_connections}, повторно использовано: {reuse_percent:.0f}%"
+        ]
+        busiest = sorted(self.methods.items(), key=lambda x: -x[1]["calls"])[:5]
+        for api_method, stats in busiest:
+            average = stats["total"] / stats["calls"] * 1000 if stats["calls"] else 0
+            lines.append(
+                f"• {api_method}: {stats['calls']} шт, ~{average:.0f} мс, макс {stats['max'] * 1000:.0f} мс"
+                + (f", ошибок {stats['errors']}" if stats["errors"] else "")
+            )
+        return "\n".join(lines)
+
+def method_timeouts():
+    """METHOD_TIMEOUTS с поправками из API_TIMEOUTS; кривые пары пропускаются"""
+    timeouts = dict(METHOD_TIMEOUTS)
+    for pair in filter(None, API_TIMEOUTS.split(",")):
+        try:
+            method_name, seconds = pair.split("=")
+            timeouts[method_name.strip()] = float(seconds)
+        except ValueError:
+            logger.warning(f"⚠️ API_TIMEOUTS: пропускаю неверное значение «{pair}», нужно метод=секунды")
+    return timeouts
+
+# Транспорты по назначению, для статистики в /stats
+transports = {}
+
+def build_request(name, connection_pool_size, **kwargs):
+    """TrackedRequest с HTTP_VERSION; без пакета h2 откатывается на HTTP/1.1"""
+    try:
+        request = TrackedRequest(connection_pool_size, http_version=HTTP_VERSION, **kwargs)
+    except RuntimeError as e:
+        logger.warning(f"⚠️ HTTP/{HTTP_VERSION} недоступен ({e}), используется HTTP/1.1")
+        request = TrackedRequest(connection_pool_size, http_version="1.1", **kwargs)
+    transports[name] = request
+    return request
 
 # ====================
 # БАЗА ДАННЫХ
@@ -38,65 +247,366 @@ def load_data(filename):
         logger.error(f"Ошибка загрузки {filename}: {e}")
         return {}
 
-def save_data(filename, data):
+# Счётчик записей на диск по именам файлов (считает симуляция)
+disk_writes = {}
+
+def count_write(filename):
+    name = os.path.basename(filename)
+    disk_writes[name] = disk_writes.get(name, 0) + 1
+
+def save_data(filename, data, indent=4, separators=None):
     """Сохраняет данные в JSON файл"""
+    count_write(filename)
     try:
+        # dumps, а не dump: без отступов так работает быстрый кодировщик на C
         with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.write(json.dumps(data, indent=indent, separators=separators, ensure_ascii=False))
     except Exception as e:
         logger.error(f"Ошибка сохранения {filename}: {e}")
 
+# Разобранный users.json: полный путь -> ((mtime, размер), данные)
+_users_cache = {}
+
+def _file_key(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
 def load_users():
-    return load_data(DATA_FILE)
+    """Пользователи из DATA_FILE; файл разбирается заново, только если он изменился"""
+    path = os.path.abspath(DATA_FILE)
+    try:
+        key = _file_key(path)
+    except OSError:
+        return {}
+    
+    cached = _users_cache.get(path)
+    if cached is None or cached[0] != key:
+        cached = (key, load_data(path))
+        _users_cache[path] = cached
+    # Копия: обработчики меняют словарь перед save_users
+    return dict(cached[1])
 
 def save_users(data):
-    save_data(DATA_FILE, data)
+    # Пишется на каждом проходе с истекшими: с indent кодировщик медленный (чистый Python),
+    # а перенос строки в разделителе оставляет по записи на строку
+    save_data(DATA_FILE, data, indent=None, separators=(",\n", ": "))
+    # Свою запись запоминаем сразу: по mtime две быстрые записи подряд не различить
+    path = os.path.abspath(DATA_FILE)
+    try:
+        _users_cache[path] = (_file_key(path), dict(data))
+    except OSError:
+        _users_cache.pop(path, None)
+
+def append_record(filename, record):
+    """Дописывает одну запись в конец JSON-lines файла"""
+    count_write(filename)
+    try:
+        with open(filename, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except Exception as e:
+        logger.error(f"Ошибка записи {filename}: {e}")
+
+# ====================
+# ИСТОРИЯ
+# ====================
+class History:
+    """История действий в памяти с индексами по пользователю, типу и времени"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.records = []  # по возрастанию времени
+        self.times = []
+        self.by_user = {}  # user_id -> номера записей по возрастанию
+        self.by_kind = {}  # тип -> номера записей по возрастанию
+
+    def index(self, record):
+        position = len(self.records)
+        self.records.append(record)
+        self.times.append(record["time"])
+        if record.get("user_id") is not None:
+            self.by_user.setdefault(record["user_id"], []).append(position)
+        self.by_kind.setdefault(record["kind"], []).append(position)
+
+    def _slice(self, user_id, kind, since, until):
+        """Индекс для перебора и границы в нём: (список номеров или None, от, до)"""
+        # Диапазон времени -> диапазон номеров записей
+        lo = bisect.bisect_left(self.times, since) if since is not None else 0
+        hi = bisect.bisect_left(self.times, until) if until is not None else len(self.records)
+        
+        candidates = []
+        if user_id is not None:
+            candidates.append(self.by_user.get(user_id, []))
+        if kind is not None:
+            candidates.append(self.by_kind.get(kind, []))
+        
+        if not candidates:
+            return None, lo, hi
+        # Берём самый короткий индекс, остальные условия проверяем на нём
+        shortest = min(candidates, key=len)
+        return shortest, bisect.bisect_left(shortest, lo), bisect.bisect_left(shortest, hi)
 
-def add_to_history(action):
-    """Добавляет действие в историю"""
-    history = load_data(HISTORY_FILE)
-    timestamp = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
+    def _matches(self, record, user_id, kind):
+        if user_id is not None and record.get("user_id") != user_id:
+            return False
+        return kind is None or record["kind"] == kind
+
+    def query(self, user_id=None, kind=None, since=None, until=None, limit=None):
+        """Записи по фильтрам, от новых к старым; не больше limit штук"""
+        positions, lo, hi = self._slice(user_id, kind, since, until)
+        result = []
+        for i in range(hi - 1, lo - 1, -1):
+            record = self.records[positions[i] if positions is not None else i]
+            if not self._matches(record, user_id, kind):
+                continue
+            result.append(record)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def count(self, user_id=None, kind=None, since=None, until=None):
+        """Сколько записей подходит под фильтры, без копирования самих записей"""
+        positions, lo, hi = self._slice(user_id, kind, since, until)
+        if user_id is None or kind is None:
+            # Один индекс (или только время) - ответ уже в границах
+            return hi - lo
+        return sum(1 for i in range(lo, hi) if self._matches(self.records[positions[i]], user_id, kind))
+
+# Шаблоны старых текстов истории -> тип записи
+LEGACY_PATTERNS = [
+    ("add", r"Добавлен пользователь (?P<user>\d+) \((?P<days>\d+) дней\)"),
+    ("update", r"Обновлён пользователь (?P<user>\d+) \(\+(?P<days>\d+) дней\)"),
+    ("extend", r"Продлён пользователь (?P<user>\d+) \(\+(?P<days>\d+) дней\)"),
+    ("remove", r"Удалён пользователь (?P<user>\d+)"),
+    ("ignore", r"Игнорирован пользователь (?P<user>\d+)"),
+    ("notify", r"Уведомление: у (?P<user>\d+) остался"),
+    ("expire", r"Авто-удаление: истек срок у (?P<user>\d+)"),
+    ("addall", r"Массовое добавление: \+(?P<days>\d+) дней"),
+]
+
+def parse_legacy_action(text):
+    """(тип, user_id, дни) по тексту старой записи; незнакомый текст - тип legacy"""
+    for kind, pattern in LEGACY_PATTERNS:
+        match = re.search(pattern, text)
+        if match:
+            fields = match.groupdict()
+            user_id = int(fields["user"]) if fields.get("user") else None
+            days = int(fields["days"]) if fields.get("days") else None
+            return kind, user_id, days
+    return "legacy", None, None
+
+def load_legacy_history():
+    """Переводит записи старого history.json в структурированный вид"""
+    legacy = load_data(LEGACY_HISTORY_FILE)
+    records = []
+    for entry in reversed(legacy.get("actions", [])):
+        try:
+            moment = datetime.strptime(entry["timestamp"], "%d.%m.%Y %H:%M:%S").timestamp()
+        except (KeyError, ValueError):
+            continue
+        action = entry.get("action", "")
+        kind, user_id, days = parse_legacy_action(action)
+        records.append({
+            "time": moment,
+            "kind": kind,
+            "user_id": user_id,
+            "days": days,
+            "actor": ADMIN_ID if kind in ("add", "update", "extend", "remove", "ignore", "addall") else None,
+            "action": action
+        })
+    return records
+
+_history = None
+
+def get_history():
+    """История из файла; читается с диска один раз, дальше живёт в памяти"""
+    global _history
+    # Ключ - полный путь: симуляция работает в своей временной папке
+    filename = os.path.abspath(HISTORY_FILE)
+    if _history is not None and _history.filename == filename:
+        return _history
+    
+    history = History(filename)
+    if os.path.exists(HISTORY_FILE):
+        try:
+            with open(HISTORY_FILE, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        except Exception as e:
+            logger.error(f"Ошибка загрузки {HISTORY_FILE}: {e}")
+            records = []
+    else:
+        # Первый запуск после обновления: переносим старую историю
+        records = load_legacy_history() if os.path.exists(LEGACY_HISTORY_FILE) else []
+        for record in records:
+            append_record(HISTORY_FILE, record)
     
-    if "actions" not in history:
-        history["actions"] = []
+    records.sort(key=lambda record: record["time"])
+    for record in records:
+        history.index(record)
     
-    history["actions"].insert(0, {
-        "timestamp": timestamp,
+    _history = history
+    return history
+
+def add_to_history(action, kind="other", user_id=None, days=None, actor=None):
+    """Добавляет действие в историю (actor=None - действие самого бота)"""
+    record = {
+        "time": clock.now().timestamp(),
+        "kind": kind,
+        "user_id": user_id,
+        "days": days,
+        "actor": actor,
         "action": action
-    })
-    
-    # Сохраняем только последние 100 действий
-    history["actions"] = history["actions"][:100]
+    }
+    history = get_history()
+    append_record(HISTORY_FILE, record)
+    history.index(record)
+
+# ====================
+# ПОИСК ПО ИМЕНИ
+# ====================
+def search_tokens(text):
+    """Слова для поиска: без регистра, @, _ и различия е/ё"""
+    # "_" тоже разделитель: ivan_petrov находится и по petrov
+    return re.findall(r"[^\W_]+", text.casefold().replace("ё", "е"))
+
+class ProfileIndex:
+    """Известные профили и префиксный индекс по словам имени и username
     
-    save_data(HISTORY_FILE, history)
+    Профили попадают сюда из get_user_info и из обновлений chat_member
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.profiles = {}  # user_id -> {"first_name", "last_name", "username"}
+        self.prefixes = {}  # префикс слова -> set(user_id)
+        self.fetched = {}  # user_id -> когда профиль последний раз пришёл от Telegram (только в памяти)
+        self.dirty = False
+
+    def is_fresh(self, user_id):
+        fetched = self.fetched.get(user_id)
+        return fetched is not None and clock.now().timestamp() - fetched < PROFILE_TTL
+
+    def _keys(self, profile):
+        keys = set()
+        for field in ("first_name", "last_name", "username"):
+            for token in search_tokens(profile.get(field) or ""):
+                for length in range(1, len(token) + 1):
+                    keys.add(token[:length])
+        return keys
+
+    def remember(self, user_id, first_name, last_name, username):
+        """Запоминает профиль; возвращает True если что-то изменилось"""
+        profile = {"first_name": first_name, "last_name": last_name, "username": username}
+        old = self.profiles.get(user_id)
+        if old == profile:
+            return False
+        
+        if old:
+            for key in self._keys(old):
+                self.prefixes[key].discard(user_id)
+        for key in self._keys(profile):
+            self.prefixes.setdefault(key, set()).add(user_id)
+        
+        self.profiles[user_id] = profile
+        self.dirty = True
+        return True
+
+    def find(self, text):
+        """ID пользователей, у которых каждое слово запроса - начало слова имени или username"""
+        tokens = search_tokens(text)
+        if not tokens:
+            return []
+        
+        # Пересекаем начиная с самого короткого множества
+        matches = sorted((self.prefixes.get(token, set()) for token in tokens), key=len)
+        result = set(matches[0])
+        for ids in matches[1:]:
+            result &= ids
+        return sorted(result)
+
+    def save(self):
+        if self.dirty:
+            # Без отступов: это кэш, а не файл для ручной правки, и так он пишется в разы быстрее
+            save_data(self.filename, {str(user_id): profile for user_id, profile in self.profiles.items()}, indent=None)
+            self.dirty = False
+
+_profiles = None
+
+def get_profiles():
+    """Индекс профилей; читается с диска один раз, дальше живёт в памяти"""
+    global _profiles
+    filename = os.path.abspath(PROFILES_FILE)
+    if _profiles is None or _profiles.filename != filename:
+        index = ProfileIndex(filename)
+        for user_id_str, profile in load_data(PROFILES_FILE).items():
+            index.remember(int(user_id_str), profile.get("first_name"), profile.get("last_name"), profile.get("username"))
+        index.dirty = False
+        _profiles = index
+    return _profiles
+
+def remember_profile(user, save=True):
+    """Добавляет в индекс профиль из ответа Telegram (User или Chat)"""
+    profiles = get_profiles()
+    profiles.remember(user.id, user.first_name, user.last_name, user.username)
+    profiles.fetched[user.id] = clock.now().timestamp()
+    if save:
+        profiles.save()
 
 # ====================
 # ПОЛУЧЕНИЕ ИНФОРМАЦИИ О ПОЛЬЗОВАТЕЛЕ
 # ====================
-async def get_user_info(bot, user_id):
-    """Получает информацию о пользователе"""
-    try:
-        user = await bot.get_chat(user_id)
-        name_parts = []
-        if user.first_name:
-            name_parts.append(user.first_name)
-        if user.last_name:
-            name_parts.append(user.last_name)
-        
-        return {
-            "name": " ".join(name_parts) if name_parts else "Неизвестно",
-            "username": f"@{user.username}" if user.username else "нет username",
-            "id": user_id,
-            "profile_link": f"[Профиль](tg://user?id={user_id})"
-        }
-    except Exception as e:
-        logger.error(f"Ошибка получения информации о пользователе {user_id}: {e}")
-        return {
-            "name": "Неизвестно",
-            "username": "нет username",
-            "id": user_id,
-            "profile_link": f"[Профиль](tg://user?id={user_id})"
-        }
+async def get_user_info(bot, user_id, save=True):
+    """Получает информацию о пользователе (свежий профиль берётся из кэша без запроса)"""
+    profiles = get_profiles()
+    if not profiles.is_fresh(user_id):
+        try:
+            user = await bot.get_chat(user_id)
+            remember_profile(user, save)
+        except Exception as e:
+            logger.error(f"Ошибка получения информации о пользователе {user_id}: {e}")
+    
+    # При ошибке запроса отдаём то, что знали раньше
+    profile = profiles.profiles.get(user_id, {})
+    name_parts = []
+    if profile.get("first_name"):
+        name_parts.append(profile["first_name"])
+    if profile.get("last_name"):
+        name_parts.append(profile["last_name"])
+    
+    return {
+        "name": " ".join(name_parts) if name_parts else "Неизвестно",
+        "username": f"@{profile['username']}" if profile.get("username") else "нет username",
+        "id": user_id,
+        "profile_link": f"[Профиль](tg://user?id={user_id})"
+    }
+
+_cache = {}
+
+async def cached(key, ttl, fetch, keep=None):
+    """Результат fetch() из кэша, если он моложе ttl секунд; keep(value) решает, кэшировать ли"""
+    now = clock.now().timestamp()
+    entry = _cache.get(key)
+    if entry and now - entry[1] < ttl:
+        return entry[0]
+    value = await fetch()
+    if keep is None or keep(value):
+        _cache[key] = (value, now)
+    else:
+        _cache.pop(key, None)
+    return value
+
+async def get_channel(bot):
+    """Информация о канале (название и т.п.)"""
+    return await cached("channel", CHANNEL_TTL, lambda: bot.get_chat(CHANNEL_ID))
+
+async def get_bot_member(bot):
+    """Статус самого бота в канале"""
+    # Кэшируем только права админа: если бота только что назначили, /getids должен
+    # увидеть это сразу, а не через CHANNEL_TTL
+    return await cached(
+        "bot_member", CHANNEL_TTL,
+        lambda: bot.get_chat_member(CHANNEL_ID, bot.id),
+        keep=lambda member: member.status in ["administrator", "creator"]
+    )
 
 # ====================
 # ПРОВЕРКА АДМИНА
@@ -133,10 +643,13 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"• /extend ID ДНИ - продлить подписку\n"
         f"• /remove ID - удалить пользователя\n"
         f"• /check - список всех пользователей\n"
-        f"• /getids - ID всех участников канала\n"
+        f"• /find ТЕКСТ - найти ID по имени или username\n"
         f"• /history - история действий\n"
+        f"• /history user ID - история пользователя\n"
+        f"• /history since ДД.ММ.ГГГГ - история с даты\n"
         f"• /stats - статистика\n"
-        f"• /ignore ID - игнорировать нового участника",
+        f"• /ignore ID - игнорировать нового участника\n"
+        f"• /reconcile - сверить канал с базой (apply - удалить лишних)",
         parse_mode='Markdown'
     )
 
@@ -172,15 +685,17 @@ async def add_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         data[user_key] = new_end
         
         action = f"📅 Обновлён пользователь {user_id} (+{days} дней)"
+        kind = "update"
     else:
         # Новый пользователь
-        end_date = datetime.now() + timedelta(days=days)
+        end_date = clock.now() + timedelta(days=days)
         data[user_key] = end_date.timestamp()
         
         action = f"✅ Добавлен пользователь {user_id} ({days} дней)"
+        kind = "add"
     
     save_users(data)
-    add_to_history(action)
+    add_to_history(action, kind, user_id, days, update.effective_user.id)
     
     end_date = datetime.fromtimestamp(data[user_key])
     
@@ -229,8 +744,10 @@ async def add_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 if user_id == context.bot.id:
                     continue
                 
+                remember_profile(member.user, save=False)
+                
                 user_key = str(user_id)
-                end_date = datetime.now() + timedelta(days=days)
+                end_date = clock.now() + timedelta(days=days)
                 
                 if user_key in data:
                     data[user_key] = end_date.timestamp()
@@ -244,7 +761,11 @@ async def add_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 continue
         
         save_users(data)
-        add_to_history(f"📊 Массовое добавление: +{days} дней для {added_count + updated_count} пользователей")
+        get_profiles().save()
+        add_to_history(
+            f"📊 Массовое добавление: +{days} дней для {added_count + updated_count} пользователей",
+            "addall", days=days, actor=update.effective_user.id
+        )
         
         result_message = (
             f"✅ **МАССОВОЕ ДОБАВЛЕНИЕ ЗАВЕРШЕНО!**\n\n"
@@ -254,7 +775,7 @@ async def add_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"• Всего обработано: {added_count + updated_count}\n"
             f"• Срок: {days} дней\n\n"
             f"⏳ **Новый срок для всех:**\n"
-            f"До: {(datetime.now() + timedelta(days=days)).strftime('%d.%m.%Y')}"
+            f"До: {(clock.now() + timedelta(days=days)).strftime('%d.%m.%Y')}"
         )
         
         if errors:
@@ -308,7 +829,7 @@ async def extend_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     data[user_key] = new_end
     save_users(data)
     
-    add_to_history(f"📈 Продлён пользователь {user_id} (+{days} дней)")
+    add_to_history(f"📈 Продлён пользователь {user_id} (+{days} дней)", "extend", user_id, days, update.effective_user.id)
     
     old_date = datetime.fromtimestamp(current_end)
     new_date = datetime.fromtimestamp(new_end)
@@ -367,7 +888,7 @@ async def remove_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     del data[user_key]
     save_users(data)
     
-    add_to_history(f"🗑️ Удалён пользователь {user_id}")
+    add_to_history(f"🗑️ Удалён пользователь {user_id}", "remove", user_id, actor=update.effective_user.id)
     
     await update.message.reply_text(
         f"✅ **ПОЛЬЗОВАТЕЛЬ УДАЛЁН!**\n\n"
@@ -393,7 +914,7 @@ async def check_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     await update.message.reply_text("⏳ Получаю информацию о пользователях...")
     
-    now = datetime.now().timestamp()
+    now = clock.now().timestamp()
     active_users = []
     expired_users = []
     
@@ -406,7 +927,7 @@ async def check_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
         end_date = datetime.fromtimestamp(end_time)
         
         try:
-            user_info = await get_user_info(context.bot, user_id)
+            user_info = await get_user_info(context.bot, user_id, save=False)
         except:
             user_info = {
                 "name": "Неизвестно",
@@ -426,6 +947,9 @@ async def check_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
         else:
             expired_users.append(user_data)
     
+    # Профили пишем на диск один раз за всю команду
+    get_profiles().save()
+    
     # Показываем активных пользователей
     if active_users:
         message = "🟢 **АКТИВНЫЕ ПОЛЬЗОВАТЕЛИ:**\n\n"
@@ -444,7 +968,7 @@ async def check_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if i % 5 == 0:
                 await update.message.reply_text(message, parse_mode='Markdown')
                 message = ""
-                await asyncio.sleep(0.5)
+                await clock.sleep(0.5)
         
         if message:
             await update.message.reply_text(message, parse_mode='Markdown')
@@ -464,7 +988,7 @@ async def check_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if i % 5 == 0:
                 await update.message.reply_text(message, parse_mode='Markdown')
                 message = ""
-                await asyncio.sleep(0.5)
+                await clock.sleep(0.5)
         
         if message:
             await update.message.reply_text(message, parse_mode='Markdown')
@@ -486,7 +1010,7 @@ async def get_ids(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Проверяем что бот админ
     try:
-        chat_member = await context.bot.get_chat_member(CHANNEL_ID, context.bot.id)
+        chat_member = await get_bot_member(context.bot)
         if chat_member.status not in ["administrator", "creator"]:
             await update.message.reply_text(
                 "❌ **БОТ НЕ ЯВЛЯЕТСЯ АДМИНИСТРАТОРОМ!**\n\n"
@@ -517,6 +1041,7 @@ async def get_ids(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if user.id == context.bot.id:
                 continue
             
+            remember_profile(user, save=False)
             count += 1
             
             name_parts = []
@@ -536,11 +1061,13 @@ async def get_ids(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if count % 5 == 0:
                 await update.message.reply_text(message, parse_mode='Markdown')
                 message = ""
-                await asyncio.sleep(0.5)
+                await clock.sleep(0.5)
         
         if message:
             await update.message.reply_text(message, parse_mode='Markdown')
         
+        get_profiles().save()
+        
         await update.message.reply_text(
             f"✅ **ГОТОВО!**\n\n"
             f"📊 Всего участников: {count}\n\n"
@@ -555,38 +1082,121 @@ async def get_ids(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         await update.message.reply_text(f"❌ **ОШИБКА:** {str(e)}")
 
+async def find_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Найти пользователя по имени или username /find ТЕКСТ"""
+    if not await admin_only(update, context):
+        return
+    
+    query = " ".join(context.args or [])
+    if not search_tokens(query):
+        await update.message.reply_text(
+            "❌ **НЕПРАВИЛЬНЫЙ ФОРМАТ!**\n\n"
+            "📝 **Правильно:**\n"
+            "`/find Иван`\n"
+            "`/find @ivan`\n\n"
+            "• Ищет по началу слов имени и username\n"
+            "• Знает тех, чей профиль бот уже получал (/adduser, /check, уведомления) "
+            "или видел при входе и выходе из канала",
+            parse_mode='Markdown'
+        )
+        return
+    
+    profiles = get_profiles()
+    found = profiles.find(query)
+    
+    if not found:
+        await update.message.reply_text(f"🔍 По запросу «{query}» никого не найдено")
+        return
+    
+    data = load_users()
+    now = clock.now().timestamp()
+    
+    message = f"🔍 **НАЙДЕНО: {len(found)}**\n\n"
+    for i, user_id in enumerate(found[:20], 1):
+        profile = profiles.profiles[user_id]
+        name = " ".join(part for part in (profile["first_name"], profile["last_name"]) if part) or "Неизвестно"
+        
+        # _ и * в именах ломают разбор Markdown всего сообщения
+        message += f"{i}. **{escape_markdown(name)}**\n"
+        message += f"   📱 [Профиль](tg://user?id={user_id})\n"
+        message += f"   🆔 ID: `{user_id}`\n"
+        if profile["username"]:
+            message += f"   🔗 @{escape_markdown(profile['username'])}\n"
+        
+        end_time = data.get(str(user_id))
+        if end_time is None:
+            message += "   ❔ Нет в базе\n\n"
+        elif end_time > now:
+            message += f"   📅 До: {datetime.fromtimestamp(end_time).strftime('%d.%m.%Y %H:%M')}\n\n"
+        else:
+            message += f"   ⏰ Истек: {datetime.fromtimestamp(end_time).strftime('%d.%m.%Y')}\n\n"
+    
+    if len(found) > 20:
+        message += f"…и ещё {len(found) - 20}, уточните запрос"
+    
+    await update.message.reply_text(message, parse_mode='Markdown')
+
+HISTORY_KINDS = ["add", "update", "addall", "extend", "remove", "ignore", "notify", "expire", "kick", "prune", "legacy"]
+
 async def show_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Показать историю действий /history"""
+    """Показать историю действий /history [user ID] [type ТИП] [since ДАТА] [until ДАТА] [КОЛ-ВО]"""
     if not await admin_only(update, context):
         return
     
+    count = 50
+    filters = {}
+    args = list(context.args or [])
     try:
-        count = 50
-        if context.args:
-            try:
-                count = int(context.args[0])
-                count = min(count, 100)
-            except:
-                pass
-    except:
-        count = 50
+        while args:
+            key = args.pop(0).lower()
+            if key.isdigit():
+                count = min(int(key), 100)
+            elif key == "user":
+                filters["user_id"] = int(args.pop(0))
+            elif key == "type" and args[0].lower() in HISTORY_KINDS:
+                filters["kind"] = args.pop(0).lower()
+            elif key == "since":
+                filters["since"] = datetime.strptime(args.pop(0), "%d.%m.%Y").timestamp()
+            elif key == "until":
+                # Включительно: до конца указанного дня
+                filters["until"] = (datetime.strptime(args.pop(0), "%d.%m.%Y") + timedelta(days=1)).timestamp()
+            else:
+                raise ValueError(key)
+    except (IndexError, ValueError):
+        await update.message.reply_text(
+            "❌ **НЕПРАВИЛЬНЫЙ ФОРМАТ!**\n\n"
+            "📝 **Правильно:**\n"
+            "`/history 20`\n"
+            "`/history user 123456789`\n"
+            "`/history type extend since 01.09.2026`\n"
+            "`/history since 01.09.2026 until 30.09.2026`\n\n"
+            f"• Типы: {', '.join(HISTORY_KINDS)}",
+            parse_mode='Markdown'
+        )
+        return
     
-    history = load_data(HISTORY_FILE)
+    history = get_history()
+    total = history.count(**filters)
+    found = history.query(**filters, limit=count)
     
-    if not history or "actions" not in history or not history["actions"]:
+    if not found:
         await update.message.reply_text("📭 **История действий пуста!**")
         return
     
-    await update.message.reply_text(f"📜 **ИСТОРИЯ ДЕЙСТВИЙ (последние {min(count, len(history['actions']))}):**\n")
+    title = "найдено" if filters else "всего"
+    await update.message.reply_text(
+        f"📜 **ИСТОРИЯ ДЕЙСТВИЙ ({title} {total}, показаны последние {len(found)}):**\n"
+    )
     
     message = ""
-    for i, action in enumerate(history["actions"][:count], 1):
-        message += f"{i}. **{action['timestamp']}** - {action['action']}\n\n"
+    for i, record in enumerate(found, 1):
+        timestamp = datetime.fromtimestamp(record["time"]).strftime("%d.%m.%Y %H:%M:%S")
+        message += f"{i}. **{timestamp}** - {record['action']}\n\n"
         
         if i % 10 == 0:
             await update.message.reply_text(message, parse_mode='Markdown')
             message = ""
-            await asyncio.sleep(0.5)
+            await clock.sleep(0.5)
     
     if message:
         await update.message.reply_text(message, parse_mode='Markdown')
@@ -597,7 +1207,7 @@ async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     data = load_users()
-    now = datetime.now().timestamp()
+    now = clock.now().timestamp()
     
     active_count = 0
     expiring_soon = 0
@@ -615,11 +1225,15 @@ async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     channel_stats = "❓ Неизвестно"
     try:
-        chat = await context.bot.get_chat(CHANNEL_ID)
+        chat = await get_channel(context.bot)
         channel_stats = f"{chat.title}"
     except:
         pass
     
+    network_stats = ""
+    for name, request in transports.items():
+        network_stats += f"\n\n🌐 **СЕТЬ ({name}):**\n{request.report()}"
+    
     await update.message.reply_text(
         f"📊 **СТАТИСТИКА СИСТЕМЫ**\n\n"
         f"👥 **ПОЛЬЗОВАТЕЛИ:**\n"
@@ -632,7 +1246,8 @@ async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"• ID: `{CHANNEL_ID}`\n\n"
         f"🤖 **БОТ:**\n"
         f"• Админ ID: `{ADMIN_ID}`\n"
-        f"• Статус: 🟢 Работает",
+        f"• Статус: {'🟢 Работает' if readiness['ready'] else '🟡 Прогрев'}"
+        + network_stats,
         parse_mode='Markdown'
     )
 
@@ -667,94 +1282,700 @@ async def ignore_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode='Markdown'
     )
     
-    add_to_history(f"👌 Игнорирован пользователь {user_id}")
+    add_to_history(f"👌 Игнорирован пользователь {user_id}", "ignore", user_id, actor=update.effective_user.id)
+
+async def reconcile_channel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Сверить участников канала с базой /reconcile [apply]"""
+    if not await admin_only(update, context):
+        return
+    
+    apply = [arg.lower() for arg in context.args or []] == ["apply"]
+    if context.args and not apply:
+        await update.message.reply_text(
+            "❌ **НЕПРАВИЛЬНЫЙ ФОРМАТ!**\n\n"
+            "📝 **Правильно:**\n"
+            "`/reconcile` - только отчёт\n"
+            "`/reconcile apply` - удалить лишних из канала и ушедших из базы",
+            parse_mode='Markdown'
+        )
+        return
+    
+    await update.message.reply_text("⏳ Сверяю участников канала с базой...")
+    
+    try:
+        result = await reconcile(context.bot, apply)
+    except Exception as e:
+        await update.message.reply_text(f"❌ **ОШИБКА:** {str(e)}")
+        return
+    
+    await update.message.reply_text(format_reconcile_report(result), parse_mode='Markdown')
 
 # ====================
 # ФОНОВЫЕ ПРОВЕРКИ
 # ====================
+async def check_subscriptions(bot, notified_users):
+    """Один проход проверки подписок: уведомления и удаление истекших; возвращает базу после прохода"""
+    data = load_users()
+    now = clock.now().timestamp()
+    
+    # Дальше суток до конца - делать нечего, отбираем заранее
+    expired = []
+    due = [(user_id_str, end_time) for user_id_str, end_time in data.items() if end_time - now < 86400]
+    for user_id_str, end_time in due:
+        user_id = int(user_id_str)
+        remaining = end_time - now
+        
+        # Уведомление за 1 день (24 часа)
+        if 0 < remaining < 86400:
+            last_notified = notified_users.get(user_id_str)
+            
+            if not last_notified or (now - last_notified) > 43200:
+                try:
+                    user_info = await get_user_info(bot, user_id, save=False)
+                    
+                    await bot.send_message(
+                        ADMIN_ID,
+                        f"⚠️ **СКОРО ИСТЕКАЕТ ПОДПИСКА!**\n\n"
+                        f"👤 **{user_info['name']}**\n"
+                        f"📱 {user_info['profile_link']}\n"
+                        f"🆔 ID: `{user_id}`\n"
+                        f"🔗 {user_info['username']}\n\n"
+                        f"⏳ **Осталось менее 1 дня!**\n"
+                        f"📅 Истекает: {datetime.fromtimestamp(end_time).strftime('%d.%m.%Y %H:%M')}\n\n"
+                        f"💡 **Действие:**\n"
+                        f"Используйте: `/extend {user_id} ДНИ`",
+                        parse_mode='Markdown'
+                    )
+                    
+                    notified_users[user_id_str] = now
+                    add_to_history(f"⏰ Уведомление: у {user_id} остался 1 день", "notify", user_id)
+                    
+                except Exception as e:
+                    logger.error(f"Ошибка уведомления для {user_id}: {e}")
+        
+        # Удаление при истечении
+        if remaining <= 0:
+            try:
+                # Удаляем из канала
+                await bot.ban_chat_member(CHANNEL_ID, user_id)
+                await bot.unban_chat_member(CHANNEL_ID, user_id)
+                
+                if user_id_str in notified_users:
+                    del notified_users[user_id_str]
+                
+                # Из базы удаляем одной записью после прохода
+                expired.append((user_id_str, end_time))
+                
+                user_info = await get_user_info(bot, user_id, save=False)
+                
+                await bot.send_message(
+                    ADMIN_ID,
+                    f"🗑️ **ПОДПИСКА ИСТЕКЛА!**\n\n"
+                    f"👤 **{user_info['name']}**\n"
+                    f"📱 {user_info['profile_link']}\n"
+                    f"🆔 ID: `{user_id}`\n"
+                    f"🔗 {user_info['username']}\n\n"
+                    f"⏰ **Автоматически удалён из канала**\n"
+                    f"🕐 Время: {clock.now().strftime('%d.%m.%Y %H:%M')}",
+                    parse_mode='Markdown'
+                )
+                
+                add_to_history(f"🗑️ Авто-удаление: истек срок у {user_id}", "expire", user_id)
+                
+            except Exception as e:
+                logger.error(f"Ошибка удаления {user_id}: {e}")
+    
+    if expired:
+        # Пока шли запросы, команды могли поменять базу: удаляем по свежей копии
+        # и только тех, кого за это время не продлили
+        data = load_users()
+        for user_id_str, end_time in expired:
+            if data.get(user_id_str) == end_time:
+                del data[user_id_str]
+        save_users(data)
+    
+    # Профили пишем на диск один раз за проход
+    get_profiles().save()
+    return data
+
 async def background_checker(app):
     """Фоновая проверка подписок"""
     notified_users = {}
     
     while True:
         try:
-            data = load_users()
-            now = datetime.now().timestamp()
+            await check_subscriptions(app.bot, notified_users)
+            get_members().save()
+        except Exception as e:
+            logger.error(f"Ошибка в фоновой проверке: {e}")
+        
+        await clock.sleep(CHECK_INTERVAL)
+
+# ====================
+# СВЕРКА КАНАЛА С БАЗОЙ
+# ====================
+# В Bot API нет метода "список участников канала", поэтому участников знаем только
+# по обновлениям chat_member (вход, выход, бан) и по точечным get_chat_member
+JOINED_STATUSES = ["member", "restricted"]
+PRESENT_STATUSES = JOINED_STATUSES + ["administrator", "creator"]
+GONE_STATUSES = ["left", "kicked"]
+
+class ChannelMembers:
+    """Последний известный статус каждого участника канала"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.status = {}  # user_id -> статус
+        self.dirty = False
+
+    def update(self, user_id, status):
+        if self.status.get(user_id) != status:
+            self.status[user_id] = status
+            self.dirty = True
+
+    def with_status(self, statuses):
+        return {user_id for user_id, status in self.status.items() if status in statuses}
+
+    def save(self):
+        if self.dirty:
+            save_data(self.filename, {str(user_id): status for user_id, status in self.status.items()}, indent=None)
+            self.dirty = False
+
+_members = None
+
+def get_members():
+    """Участники канала; читаются с диска один раз, дальше живут в памяти"""
+    global _members
+    filename = os.path.abspath(MEMBERS_FILE)
+    if _members is None or _members.filename != filename:
+        members = ChannelMembers(filename)
+        for user_id_str, status in load_data(filename).items():
+            members.status[int(user_id_str)] = status
+        _members = members
+    return _members
+
+def member_status(member):
+    """Статус из ChatMember; restricted без членства - это уже не участник"""
+    if member.status == "restricted" and not getattr(member, "is_member", True):
+        return "left"
+    return member.status
+
+async def track_channel_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обновление chat_member: запоминаем вход и выход участников канала"""
+    change = update.chat_member
+    if change is None or change.chat.id != CHANNEL_ID:
+        return
+    
+    member = change.new_chat_member
+    get_members().update(member.user.id, member_status(member))
+    remember_profile(member.user, save=False)
+
+async def reconcile_pause():
+    """Пауза между запросами сверки (RECONCILE_RATE в секунду, 0 - без пауз)"""
+    if RECONCILE_RATE > 0:
+        await clock.sleep(1 / RECONCILE_RATE)
+
+def reconcile_plan(statuses, store_ids, ignored, excluded, recent):
+    """Чистая часть сверки: кого выгнать из канала и кого проверить на удаление из базы
+    
+    statuses - известные статусы участников, store_ids - ID из базы, ignored - /ignore,
+    excluded - сам бот и админ, recent - добавленные или продлённые в пределах RECONCILE_GRACE
+    """
+    joined = {user_id for user_id, status in statuses.items() if status in JOINED_STATUSES}
+    present = {user_id for user_id, status in statuses.items() if status in PRESENT_STATUSES}
+    # Админы канала сюда не попадают по статусу: administrator/creator не в JOINED_STATUSES
+    unauthorized = sorted(joined - store_ids - ignored - excluded)
+    # Недавно добавленные или продлённые могли ещё не вступить
+    candidates = sorted(store_ids - present - recent)
+    return unauthorized, candidates
+
+async def reconcile(bot, apply=False):
+    """Сверяет известных участников канала с базой; apply=False - только отчёт"""
+    data = load_users()
+    snapshot_time = clock.now().timestamp()
+    members = get_members()
+    history = get_history()
+    store_ids = {int(user_key) for user_key in data}
+    
+    ignored = {record["user_id"] for record in history.query(kind="ignore")}
+    grace_since = clock.now().timestamp() - RECONCILE_GRACE
+    recent = {
+        record["user_id"]
+        for kind in ("add", "update", "extend")
+        for record in history.query(kind=kind, since=grace_since)
+    }
+    unauthorized, candidates = reconcile_plan(members.status, store_ids, ignored, {bot.id, ADMIN_ID}, recent)
+    
+    result = {
+        "apply": apply,
+        "tracked": len(members.with_status(PRESENT_STATUSES)),
+        "unauthorized": 0,
+        "kicked": 0,
+        "left": 0,
+        "pruned": 0,
+        "never_joined": 0,
+        "unconfirmed": 0,
+        "unauthorized_sample": [],
+        "left_sample": [],
+    }
+    
+    result["unauthorized"] = len(unauthorized)
+    result["unauthorized_sample"] = unauthorized[:20]
+    
+    if apply:
+        for user_id in unauthorized:
+            # Пользователя могли добавить, пока идёт сверка: снимок базы обновляем раз в 10 сек
+            if clock.now().timestamp() - snapshot_time > 10:
+                data = load_users()
+                snapshot_time = clock.now().timestamp()
+            if str(user_id) in data:
+                continue
             
-            for user_id_str, end_time in data.items():
-                user_id = int(user_id_str)
-                remaining = end_time - now
-                
-                # Уведомление за 1 день (24 часа)
-                if 0 < remaining < 86400:
-                    last_notified = notified_users.get(user_id_str)
-                    
-                    if not last_notified or (now - last_notified) > 43200:
-                        try:
-                            user_info = await get_user_info(app.bot, user_id)
-                            
-                            await app.bot.send_message(
-                                ADMIN_ID,
-                                f"⚠️ **СКОРО ИСТЕКАЕТ ПОДПИСКА!**\n\n"
-                                f"👤 **{user_info['name']}**\n"
-                                f"📱 {user_info['profile_link']}\n"
-                                f"🆔 ID: `{user_id}`\n"
-                                f"🔗 {user_info['username']}\n\n"
-                                f"⏳ **Осталось менее 1 дня!**\n"
-                                f"📅 Истекает: {datetime.fromtimestamp(end_time).strftime('%d.%m.%Y %H:%M')}\n\n"
-                                f"💡 **Действие:**\n"
-                                f"Используйте: `/extend {user_id} ДНИ`",
-                                parse_mode='Markdown'
-                            )
-                            
-                            notified_users[user_id_str] = now
-                            add_to_history(f"⏰ Уведомление: у {user_id} остался 1 день")
-                            
-                        except Exception as e:
-                            logger.error(f"Ошибка уведомления для {user_id}: {e}")
-                
-                # Удаление при истечении
-                if remaining <= 0:
-                    try:
-                        # Удаляем из канала
-                        await app.bot.ban_chat_member(CHANNEL_ID, user_id)
-                        await app.bot.unban_chat_member(CHANNEL_ID, user_id)
-                        
-                        if user_id_str in notified_users:
-                            del notified_users[user_id_str]
-                        
-                        # Удаляем из базы
-                        del data[user_id_str]
-                        save_users(data)
-                        
-                        user_info = await get_user_info(app.bot, user_id)
-                        
-                        await app.bot.send_message(
-                            ADMIN_ID,
-                            f"🗑️ **ПОДПИСКА ИСТЕКЛА!**\n\n"
-                            f"👤 **{user_info['name']}**\n"
-                            f"📱 {user_info['profile_link']}\n"
-                            f"🆔 ID: `{user_id}`\n"
-                            f"🔗 {user_info['username']}\n\n"
-                            f"⏰ **Автоматически удалён из канала**\n"
-                            f"🕐 Время: {datetime.now().strftime('%d.%m.%Y %H:%M')}",
-                            parse_mode='Markdown'
-                        )
-                        
-                        add_to_history(f"🗑️ Авто-удаление: истек срок у {user_id}")
-                        
-                    except Exception as e:
-                        logger.error(f"Ошибка удаления {user_id}: {e}")
+            try:
+                await bot.ban_chat_member(CHANNEL_ID, user_id)
+                await bot.unban_chat_member(CHANNEL_ID, user_id)
+                members.update(user_id, "left")
+                result["kicked"] += 1
+                add_to_history(f"🚫 Сверка: удалён из канала без подписки {user_id}", "kick", user_id)
+            except Exception as e:
+                logger.error(f"Ошибка удаления при сверке {user_id}: {e}")
+            await reconcile_pause()
+    
+    # Каждого кандидата подтверждаем у Telegram. Удаляем из базы только тех, чей выход
+    # бот видел сам: "left" от get_chat_member бывает и у тех, кто оплатил, но ещё не вступил
+    left = []
+    for user_id in candidates:
+        try:
+            status = member_status(await bot.get_chat_member(CHANNEL_ID, user_id))
+        except Exception as e:
+            logger.error(f"Ошибка проверки участника {user_id}: {e}")
+            result["unconfirmed"] += 1
+            await reconcile_pause()
+            continue
+        await reconcile_pause()
         
+        if status in PRESENT_STATUSES:
+            members.update(user_id, status)
+        elif members.status.get(user_id) in GONE_STATUSES:
+            left.append(user_id)
+        else:
+            result["never_joined"] += 1
+    
+    result["left"] = len(left)
+    result["left_sample"] = left[:20]
+    
+    if apply and left:
+        data = load_users()
+        for user_id in left:
+            if data.pop(str(user_id), None) is not None:
+                result["pruned"] += 1
+                add_to_history(f"🧹 Сверка: удалён из базы, вышел из канала {user_id}", "prune", user_id)
+        save_users(data)
+    
+    members.save()
+    return result
+
+def format_reconcile_report(result):
+    """Текст отчёта о сверке для админа"""
+    mode = "" if result["apply"] else " (только отчёт)"
+    message = (
+        f"🔍 **СВЕРКА КАНАЛА С БАЗОЙ{mode}**\n\n"
+        f"• Известно участников: {result['tracked']}\n"
+        f"• В канале без подписки: {result['unauthorized']}\n"
+        f"• В базе, но вышли из канала: {result['left']}\n"
+        f"• В базе, но ещё не вступали: {result['never_joined']}\n"
+    )
+    if result["unconfirmed"]:
+        message += f"• Не удалось проверить: {result['unconfirmed']}\n"
+    if result["apply"]:
+        message += (
+            f"• Удалено из канала: {result['kicked']}\n"
+            f"• Удалено из базы: {result['pruned']}\n"
+        )
+    
+    if result["unauthorized_sample"]:
+        message += "\n🚫 **Без подписки:**\n"
+        message += "\n".join(f"• `{user_id}`" for user_id in result["unauthorized_sample"])
+        message += "\n"
+    if result["left_sample"]:
+        message += "\n🚪 **Вышли из канала:**\n"
+        message += "\n".join(f"• `{user_id}`" for user_id in result["left_sample"])
+        message += "\n"
+    
+    if not result["apply"] and (result["unauthorized"] or result["left"]):
+        message += "\n💡 Чтобы удалить: `/reconcile apply`"
+    return message
+
+async def reconcile_checker(app):
+    """Сверка по расписанию; отчёт админу, только если нашлись расхождения"""
+    while True:
+        await clock.sleep(RECONCILE_INTERVAL)
+        try:
+            result = await reconcile(app.bot, apply=not RECONCILE_DRY_RUN)
+            if result["unauthorized"] or result["left"]:
+                await app.bot.send_message(ADMIN_ID, format_reconcile_report(result), parse_mode='Markdown')
         except Exception as e:
-            logger.error(f"Ошибка в фоновой проверке: {e}")
+            logger.error(f"Ошибка в сверке канала: {e}")
+
+# ====================
+# СИМУЛЯЦИЯ
+# ====================
+class SimBot:
+    """Поддельный бот для симуляции: записывает каждый вызов API, каждый занимает latency секунд"""
+
+    def __init__(self, members, latency=0.0):
+        self.id = 1
+        self.members = members
+        self.latency = latency
+        self.calls = []
+
+    async def _record(self, method):
+        self.calls.append((clock.now().timestamp(), method))
+        if self.latency:
+            await clock.sleep(self.latency)
+
+    def _user(self, user_id):
+        return SimpleNamespace(id=user_id, first_name=f"User{user_id}", last_name=None, username=f"user{user_id}")
+
+    async def get_chat(self, chat_id):
+        await self._record("get_chat")
+        if chat_id == CHANNEL_ID:
+            return SimpleNamespace(id=chat_id, title="Симуляция")
+        return self._user(chat_id)
+
+    async def get_chat_member(self, chat_id, user_id):
+        await self._record("get_chat_member")
+        if user_id == self.id:
+            status = "administrator"
+        else:
+            status = "member" if user_id in self.members else "left"
+        return SimpleNamespace(status=status, user=self._user(user_id))
+
+    async def get_chat_members(self, chat_id):
+        # В Bot API этого метода нет, это модель для /addall: один запрос на каждые 200 участников
+        for i, user_id in enumerate(list(self.members)):
+            if i % 200 == 0:
+                await self._record("get_chat_members")
+            yield SimpleNamespace(status="member", user=self._user(user_id))
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await self._record("send_message")
+
+    async def ban_chat_member(self, chat_id, user_id, **kwargs):
+        await self._record("ban_chat_member")
+        self.members.discard(user_id)
+        # Как обновление chat_member, которое прислал бы Telegram
+        get_members().update(user_id, "kicked")
+
+    async def unban_chat_member(self, chat_id, user_id, **kwargs):
+        await self._record("unban_chat_member")
+        get_members().update(user_id, "left")
+
+    def join(self, user_id):
+        """Пользователь вступил в канал (в жизни - обновление chat_member)"""
+        self.members.add(user_id)
+        get_members().update(user_id, "member")
+
+def sim_context(bot, *args):
+    """Update и context как от админа, чтобы вызывать обычные обработчики команд"""
+    async def reply_text(text, **kwargs):
+        await bot.send_message(ADMIN_ID, text, **kwargs)
+    
+    update = SimpleNamespace(
+        effective_user=SimpleNamespace(id=ADMIN_ID),
+        message=SimpleNamespace(reply_text=reply_text)
+    )
+    context = SimpleNamespace(bot=bot, args=[str(arg) for arg in args])
+    return update, context
+
+def sim_schedule(rng, start, days, adds_per_day, extends_per_day, addall_every):
+    """Генерирует события подписок на весь период, отсортированные по времени"""
+    events = []
+    for day in range(days):
+        day_start = start + timedelta(days=day)
+        for _ in range(adds_per_day):
+            events.append((day_start + timedelta(seconds=rng.uniform(0, 86400)), "adduser"))
+        for _ in range(extends_per_day):
+            events.append((day_start + timedelta(seconds=rng.uniform(0, 86400)), "extend"))
+        if addall_every and day and day % addall_every == 0:
+            events.append((day_start + timedelta(hours=12), "addall"))
+    events.sort(key=lambda event: event[0])
+    return events
+
+def sweep_due(data):
+    """С какого момента проверке подписок есть что делать: ближайшее окно уведомления"""
+    if not data:
+        return datetime.max
+    return datetime.fromtimestamp(min(data.values()) - 86400)
+
+async def simulate(days=30, users=200, adds_per_day=5, extends_per_day=3, addall_every=30, seed=1, latency=0.05):
+    """Прогоняет days суток подписок на виртуальных часах и возвращает статистику нагрузки"""
+    global clock
+    
+    rng = random.Random(seed)
+    sim_clock = SimClock(datetime(2026, 1, 1))
+    start = sim_clock.now()
+    end = start + timedelta(days=days)
+    
+    bot = SimBot(set(range(1000, 1000 + users)), latency)
+    
+    real_clock = clock
+    real_cwd = os.getcwd()
+    
+    # Все файлы данных относительные: во временной папке настоящие не трогаем
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        clock = sim_clock
+        disk_writes.clear()
+        try:
+            # Стартовая база: у каждого участника канала свой срок в пределах месяца
+            save_users({
+                str(user_id): (start + timedelta(seconds=rng.uniform(0, 30 * 86400))).timestamp()
+                for user_id in bot.members
+            })
+            
+            for user_id in list(bot.members):
+                bot.join(user_id)
+            
+            events = sim_schedule(rng, start, days, adds_per_day, extends_per_day, addall_every)
+            # due - с какого момента проверке подписок есть что делать
+            state = {"due": start, "sweeps": 0, "next_user_id": 1000 + users}
+            
+            async def commands():
+                """Команды админа в моменты из расписания"""
+                for moment, kind in events:
+                    await sim_clock.sleep_until(moment)
+                    
+                    if kind == "adduser":
+                        bot.join(state["next_user_id"])
+                        await add_user(*sim_context(bot, state["next_user_id"], rng.choice([7, 30, 90])))
+                        state["next_user_id"] += 1
+                    elif kind == "extend":
+                        known = list(load_users())
+                        if known:
+                            await extend_user(*sim_context(bot, rng.choice(known), rng.choice([7, 30])))
+                    elif kind == "addall":
+                        await add_all(*sim_context(bot, 30))
+                    
+                    state["due"] = min(state["due"], sweep_due(load_users()))
+            
+            async def checker():
+                """Как при настоящем запуске: прогрев идёт параллельно с командами,
+                проверка подписок стартует после него"""
+                await warm_up(bot)
+                next_check = sim_clock.now()
+                notified_users = {}
+                while next_check < end:
+                    await sim_clock.sleep_until(next_check)
+                    # Пока никто не подошёл к окну уведомления, проверка ничего не вызывает и не пишет:
+                    # такие проходы только считаем, это и делает год симуляции быстрым
+                    if next_check >= state["due"]:
+                        state["due"] = sweep_due(await check_subscriptions(bot, notified_users))
+                    state["sweeps"] += 1
+                    next_check += timedelta(seconds=CHECK_INTERVAL)
+            
+            async def run_all():
+                # Сверка - настоящий reconcile_checker, он может совпасть по времени с проверкой
+                reconciler = None
+                if RECONCILE_INTERVAL:
+                    reconciler = asyncio.ensure_future(reconcile_checker(SimpleNamespace(bot=bot)))
+                await asyncio.gather(commands(), checker())
+                if reconciler:
+                    reconciler.cancel()
+            
+            _cache.clear()
+            await sim_clock.run(run_all())
+            sweeps = state["sweeps"]
+            
+            final_users = len(load_users())
+            writes = dict(disk_writes)
+        finally:
+            clock = real_clock
+            os.chdir(real_cwd)
+    
+    per_hour = {}
+    per_second = {}
+    by_method = {}
+    for timestamp, method in bot.calls:
+        per_hour[int(timestamp // 3600)] = per_hour.get(int(timestamp // 3600), 0) + 1
+        per_second[int(timestamp)] = per_second.get(int(timestamp), 0) + 1
+        by_method[method] = by_method.get(method, 0) + 1
+    
+    hours = days * 24
+    return {
+        "days": days,
+        "latency": latency,
+        "sweeps": sweeps,
+        "api_calls": len(bot.calls),
+        "by_method": by_method,
+        "calls_per_hour_avg": len(bot.calls) / hours if hours else 0,
+        "calls_per_hour_max": max(per_hour.values(), default=0),
+        "peak_burst_per_second": max(per_second.values(), default=0),
+        "disk_writes": writes,
+        "final_users": final_users,
+        "final_members": len(bot.members),
+    }
+
+def format_simulation_report(report):
+    """Текстовый отчёт по результатам симуляции"""
+    lines = [
+        f"📊 СИМУЛЯЦИЯ: {report['days']} дней, {report['sweeps']} проверок (каждые {CHECK_INTERVAL} сек)",
+        f"• Вызовов API всего: {report['api_calls']}",
+        f"• В час: в среднем {report['calls_per_hour_avg']:.1f}, максимум {report['calls_per_hour_max']}",
+        f"• Пиковый всплеск: {report['peak_burst_per_second']} вызовов за 1 сек "
+        f"(ответ API {report['latency'] * 1000:.0f} мс)",
+        f"• Записей на диск: {sum(report['disk_writes'].values())}",
+    ]
+    for name, count in sorted(report["disk_writes"].items()):
+        lines.append(f"   {name}: {count}")
+    lines.append("• По методам API:")
+    for method, count in sorted(report["by_method"].items(), key=lambda x: -x[1]):
+        if method == "get_chat_members":
+            # Такого метода в Bot API нет: /addall в симуляции только смоделирован
+            lines.append(f"   {method}: {count} (только модель /addall, в Bot API метода нет)")
+        else:
+            lines.append(f"   {method}: {count}")
+    lines.append(f"• В базе в конце: {report['final_users']}, в канале: {report['final_members']}")
+    return "\n".join(lines)
+
+async def run_simulation(argv):
+    """Запуск симуляции из командной строки: python bot.py simulate --days 365"""
+    parser = argparse.ArgumentParser(prog="bot.py simulate")
+    parser.add_argument("--days", type=int, default=30, help="длительность в сутках")
+    parser.add_argument("--users", type=int, default=200, help="участников канала на старте")
+    parser.add_argument("--adds-per-day", type=int, default=5, help="/adduser в сутки")
+    parser.add_argument("--extends-per-day", type=int, default=3, help="/extend в сутки")
+    parser.add_argument("--addall-every", type=int, default=30, help="/addall раз в N суток (0 - никогда)")
+    parser.add_argument("--latency", type=float, default=0.05, help="секунд на один вызов API")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    
+    report = await simulate(
+        days=args.days,
+        users=args.users,
+        adds_per_day=args.adds_per_day,
+        extends_per_day=args.extends_per_day,
+        addall_every=args.addall_every,
+        seed=args.seed,
+        latency=args.latency
+    )
+    print(format_simulation_report(report))
+
+# ====================
+# ПРОГРЕВ И ГОТОВНОСТЬ
+# ====================
+readiness = {
+    "ready": False,
+    "warmup_seconds": None,
+    "profiles": 0,
+    "channel": None,
+    "bot_admin": None,
+}
+
+async def paced_gather(coroutines, rate):
+    """Запускает корутины не чаще rate в секунду (0 - без ограничения), выполняются они параллельно"""
+    tasks = []
+    try:
+        for coroutine in coroutines:
+            tasks.append(asyncio.ensure_future(coroutine))
+            if rate > 0:
+                await clock.sleep(1 / rate)
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    except asyncio.CancelledError:
+        # Отмена (например, таймаут прогрева) не должна оставлять запросы в фоне
+        for task in tasks:
+            task.cancel()
+        for coroutine in coroutines[len(tasks):]:
+            coroutine.close()
+        raise
+
+async def warm_up(bot):
+    """Загружает базу и заранее получает канал, права бота и профили тех, кто скоро истекает
+    (уже истекших не трогаем: их всё равно удалит первая проверка)"""
+    started = time.perf_counter()
+    
+    data = load_users()
+    get_history()
+    profiles = get_profiles()
+    
+    now = clock.now().timestamp()
+    expiring = sorted(
+        (end_time, int(user_id_str))
+        for user_id_str, end_time in data.items()
+        if 0 < end_time - now < WARMUP_WINDOW
+    )[:WARMUP_LIMIT]
+    
+    channel, bot_member, *_ = await paced_gather(
+        [get_channel(bot), get_bot_member(bot)]
+        + [get_user_info(bot, user_id, save=False) for _, user_id in expiring],
+        WARMUP_RATE
+    )
+    profiles.save()
+    
+    readiness["channel"] = None if isinstance(channel, Exception) else channel.title
+    readiness["bot_admin"] = None if isinstance(bot_member, Exception) else bot_member.status in ["administrator", "creator"]
+    readiness["profiles"] = sum(1 for _, user_id in expiring if profiles.is_fresh(user_id))
+    readiness["warmup_seconds"] = round(time.perf_counter() - started, 2)
+    readiness["ready"] = True
+    
+    logger.info(
+        f"✅ Готов к работе: прогрев {readiness['warmup_seconds']} сек, "
+        f"профилей {readiness['profiles']}/{len(expiring)}, "
+        f"канал: {readiness['channel']}, бот админ: {readiness['bot_admin']}"
+    )
+
+async def health_check(reader, writer):
+    """GET /health: 200 когда бот готов, 503 пока идёт прогрев"""
+    try:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        path = request_line[1] if len(request_line) > 1 else ""
+        
+        if path != "/health":
+            status, body = "404 Not Found", "{}"
+        else:
+            status = "200 OK" if readiness["ready"] else "503 Service Unavailable"
+            body = json.dumps(readiness, ensure_ascii=False)
         
-        await asyncio.sleep(300)
+        payload = body.encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + payload
+        )
+        await writer.drain()
+    except Exception as e:
+        logger.error(f"Ошибка проверки готовности: {e}")
+    finally:
+        writer.close()
+
+async def warm_up_and_check(app):
+    """Прогрев в фоне, затем фоновые проверки"""
+    try:
+        await asyncio.wait_for(warm_up(app.bot), WARMUP_TIMEOUT)
+    except Exception as e:
+        # Прогрев - только ускорение, бот работает и без него
+        readiness["ready"] = True
+        logger.warning(f"⚠️ Прогрев не завершён ({e!r}), продолжаю без него")
+    
+    # Фоновая проверка стартует после прогрева: канал и профили уже в кэше
+    asyncio.create_task(background_checker(app))
+    if RECONCILE_INTERVAL:
+        asyncio.create_task(reconcile_checker(app))
+
+async def on_startup(app):
+    """Вызывается до начала приёма команд: прогрев не ждём, команды принимаются сразу,
+    а /health отвечает 503, пока он не закончится"""
+    if HEALTH_PORT:
+        await asyncio.start_server(health_check, "0.0.0.0", HEALTH_PORT)
+        logger.info(f"🩺 Проверка готовности: http://0.0.0.0:{HEALTH_PORT}/health")
+    
+    asyncio.create_task(warm_up_and_check(app))
 
 # ====================
 # ЗАПУСК БОТА
 # ====================
-async def main():
+def main():
     """Основная функция запуска"""
     if not TOKEN:
         logger.error("❌ ОШИБКА: BOT_TOKEN не установлен!")
@@ -764,7 +1985,14 @@ async def main():
     logger.info(f"🚀 Запуск бота для админа {ADMIN_ID}...")
     
     # Создаем приложение
-    app = Application.builder().token(TOKEN).build()
+    app = (
+        Application.builder()
+        .token(TOKEN)
+        .request(build_request("Запросы бота", API_POOL_SIZE, method_timeouts=method_timeouts()))
+        .get_updates_request(build_request("getUpdates", UPDATES_POOL_SIZE))
+        .post_init(on_startup)
+        .build()
+    )
     
     # Добавляем обработчики команд
     app.add_handler(CommandHandler("start", start))
@@ -774,17 +2002,22 @@ async def main():
     app.add_handler(CommandHandler("remove", remove_user))
     app.add_handler(CommandHandler("check", check_users))
     app.add_handler(CommandHandler("getids", get_ids))
+    app.add_handler(CommandHandler("find", find_user))
     app.add_handler(CommandHandler("history", show_history))
     app.add_handler(CommandHandler("stats", show_stats))
     app.add_handler(CommandHandler("ignore", ignore_user))
-    
-    # Запускаем фоновую проверку
-    asyncio.create_task(background_checker(app))
+    app.add_handler(CommandHandler("reconcile", reconcile_channel))
+    app.add_handler(ChatMemberHandler(track_channel_member, ChatMemberHandler.CHAT_MEMBER))
     
     logger.info("✅ Бот запущен! Доступен только админу.")
     print("✅ Бот запущен и готов к работе!")
     
-    await app.run_polling()
+    # Прогрев и фоновая проверка запускаются в on_startup
+    # chat_member по умолчанию не приходит, а без него сверке не из чего знать участников
+    app.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if sys.argv[1:2] == ["simulate"]:
+        asyncio.run(run_simulation(sys.argv[2:]))
+    else:
+        main()
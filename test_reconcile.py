@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import bot
+
+
+def plan(statuses, store_ids=(), ignored=(), excluded=(), recent=()):
+    return bot.reconcile_plan(statuses, set(store_ids), set(ignored), set(excluded), set(recent))
+
+
+def test_member_without_subscription_is_unauthorized():
+    unauthorized, _ = plan({1: "member", 2: "member"}, store_ids={1})
+    assert unauthorized == [2]
+
+
+def test_restricted_member_counts_as_joined():
+    unauthorized, _ = plan({3: "restricted"})
+    assert unauthorized == [3]
+
+
+def test_ignored_users_are_not_kicked():
+    unauthorized, _ = plan({555: "member"}, ignored={555})
+    assert unauthorized == []
+
+
+def test_channel_admins_are_not_kicked():
+    unauthorized, _ = plan({10: "administrator", 11: "creator"})
+    assert unauthorized == []
+
+
+def test_bot_and_admin_are_not_kicked():
+    unauthorized, _ = plan({1: "member", 2: "member"}, excluded={1, 2})
+    assert unauthorized == []
+
+
+def test_left_store_users_are_prune_candidates():
+    _, candidates = plan({5: "left", 6: "member", 7: "kicked"}, store_ids={5, 6, 7, 8})
+    assert candidates == [5, 7, 8]
+
+
+def test_recently_added_users_are_not_prune_candidates():
+    _, candidates = plan({5: "left"}, store_ids={5, 8}, recent={8})
+    assert candidates == [5]
+
+
+def test_admin_in_store_is_not_a_prune_candidate():
+    _, candidates = plan({10: "administrator"}, store_ids={10})
+    assert candidates == []
+
+
+def test_legacy_ignore_protects_member_from_reconcile(tmp_path, monkeypatch):
+    """Игнор из старого history.json должен работать и после перехода на history.jsonl"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / bot.LEGACY_HISTORY_FILE).write_text(json.dumps({"actions": [
+        {"timestamp": "01.09.2026 10:00:00", "action": "👌 Игнорирован пользователь 555"},
+    ]}), encoding="utf-8")
+    monkeypatch.setattr(bot, "RECONCILE_RATE", 0)
+
+    sim_bot = bot.SimBot(set())
+    sim_bot.join(555)
+    sim_bot.join(777)
+
+    result = asyncio.run(bot.reconcile(sim_bot, apply=True))
+
+    assert result["unauthorized_sample"] == [777]
+    assert result["kicked"] == 1
+    assert sim_bot.members == {555}